@@ -221,15 +221,11 @@ def collect_block_iter_vars_used_in_access_region(
 
 
 def collect_vars_used_in_prim_expr(expr: tir.PrimExpr) -> Set[tir.Var]:
-    """Collect the variables used in the PrimExpr."""
-    tir_vars = set()
-
-    def _collect_tir_var(expr):
-        if isinstance(expr, tir.Var):
-            tir_vars.add(expr)
+    """Collect the free variables used in the PrimExpr.
 
-    tir.stmt_functor.post_order_visit(expr, _collect_tir_var)
-    return tir_vars
+    This includes the data and shape variables of the buffers accessed through BufferLoad,
+    and excludes variables bound by a Let inside the expression."""
+    return set(tir.analysis.undefined_vars(expr))
 
 
 def detect_dominant_read(block: tir.Block) -> tir.PrimExpr:
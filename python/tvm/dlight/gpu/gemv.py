@@ -16,9 +16,10 @@
 # under the License.
 """A rule for GEMV and DecodeGEMV."""
 from functools import reduce
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 
 from tvm import arith, ir, tir
+from tvm.ir import IRModule
 from tvm.target import Target
 
 from ..base import (
@@ -154,9 +155,44 @@ def normalize(
     return is_inner_reduction
 
 
+def _narrow_index_dtype(func: tir.PrimFunc) -> tir.PrimFunc:
+    """Rewrite the loop and index arithmetic of the function to int32 when all of its loop and
+    block iteration extents provably fit in int32. Otherwise return the function unchanged."""
+    iter_doms: List[Tuple[tir.Var, ir.Range]] = []
+
+    def _collect_iter_dom(node):
+        if isinstance(node, tir.For):
+            iter_doms.append((node.loop_var, ir.Range.from_min_extent(node.min, node.extent)))
+        elif isinstance(node, tir.Block):
+            iter_doms.extend((iter_var.var, iter_var.dom) for iter_var in node.iter_vars)
+
+    tir.stmt_functor.post_order_visit(func.body, _collect_iter_dom)
+    analyzer = arith.Analyzer()
+    # Inner loops are visited first. Bind the outer ones first instead, so that extents
+    # depending on enclosing loop vars are bounded by their ranges.
+    for var, dom in reversed(iter_doms):
+        analyzer.bind(var, dom)
+    int32_bound = tir.IntImm("int64", 1 << 31)
+    if not all(analyzer.can_prove(dom.extent < int32_bound) for _, dom in iter_doms):
+        return func
+    return tir.transform.NarrowDataType(32)(IRModule({"main": func}))["main"]
+
+
 class GEMV(GPUScheduleRule):
     """A rule for GEMV and DecodeGEMV."""
 
+    def __init__(self, narrow_indices: bool = False):
+        """Construct a new GEMV rule.
+
+        Parameters
+        ----------
+        narrow_indices : bool
+            Whether to narrow int64 loop variables and index arithmetic to int32 before
+            scheduling, when all the extents fit. Targets without 64-bit integer support
+            require this, and int32 indices use fewer registers on the others.
+        """
+        self.narrow_indices = narrow_indices
+
     def apply(  # pylint: disable=too-many-locals,too-many-branches,too-many-return-statements
         self,
         func: tir.PrimFunc,
@@ -165,6 +201,8 @@ class GEMV(GPUScheduleRule):
     ) -> Union[None, tir.Schedule, List[tir.Schedule]]:
         if not isinstance(func, tir.PrimFunc) or not self.is_target_available(target):
             return None
+        if self.narrow_indices:
+            func = _narrow_index_dtype(func)
         sch = tir.Schedule(func)
         block_infos = normalize_prim_func(sch)
         block_infos = try_inline_contiguous_spatial(sch, block_infos)
@@ -17,6 +17,7 @@
 """A postprocessor that verifies if the GPU code is correct"""
 
 from tvm._ffi.registry import register_object
+from tvm.target import Target
 from .. import _ffi_api
 from .postproc import Postproc
 
@@ -29,3 +30,20 @@ class VerifyGPUCode(Postproc):
         self.__init_handle_by_constructor__(
             _ffi_api.PostprocVerifyGPUCode,  # type: ignore # pylint: disable=no-member
         )
+
+    @classmethod
+    def applicable_to_target(cls, target: Target) -> bool:
+        """Check whether the postprocessor applies to the given target. The "gpu" target key
+        is used instead of the target kind, so CUDA, ROCm, Vulkan, Metal and OpenCL all qualify.
+
+        Parameters
+        ----------
+        target : Target
+            The target to check.
+
+        Returns
+        -------
+        applicable : bool
+            Whether the target is a GPU target.
+        """
+        return "gpu" in target.keys
@@ -66,6 +66,9 @@ def pytest_configure(config):
 
     for feature in utils.Feature._all_features.values():
         feature._register_marker(config)
+    config.addinivalue_line(
+        "markers", "xdist_group(name): run the marked tests on the same pytest-xdist worker"
+    )
 
     print("enabled targets:", "; ".join(map(lambda x: x[0], utils.enabled_targets())))
     print("pytest marker:", config.option.markexpr)
@@ -369,6 +372,12 @@ if HAVE_XDIST:
                     if nodeid_pattern in nodeid:
                         return suite_name
 
+                # With --dist=loadgroup, pytest-xdist appends "@<name>" to the
+                # nodeid of tests marked with @pytest.mark.xdist_group(name).
+                # An "@" inside the parameter id ("[...]") is not a group.
+                if nodeid.rfind("@") > nodeid.rfind("]"):
+                    return nodeid.split("@")[-1]
+
                 return nodeid
 
         return TvmTestScheduler(config, log)
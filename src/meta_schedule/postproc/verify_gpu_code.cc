@@ -16,6 +16,7 @@
  * specific language governing permissions and limitations
  * under the License.
  */
+#include <tvm/runtime/device_api.h>
 #include <tvm/tir/transform.h>
 
 #include "../utils.h"
@@ -110,6 +111,48 @@ Integer Extract(const Target& target, const char* name) {
   throw;
 }
 
+/*!
+ * \brief Query an attribute of the local CUDA device 0.
+ * \return The attribute, or NullOpt if the runtime is built without CUDA or no device exists.
+ */
+Optional<Integer> QueryLocalCUDADevice(runtime::DeviceAttrKind kind) {
+  Device device{kDLCUDA, 0};
+  runtime::DeviceAPI* api = runtime::DeviceAPI::Get(device, /*allow_missing=*/true);
+  if (api == nullptr) {
+    return NullOpt;
+  }
+  TVMRetValue val;
+  api->GetAttr(device, runtime::kExist, &val);
+  if (!static_cast<int>(val)) {
+    return NullOpt;
+  }
+  api->GetAttr(device, kind, &val);
+  return Integer(static_cast<int>(val));
+}
+
+/*!
+ * \brief Extract a per-block limit from a target. Auto-detected CUDA targets do not carry the
+ * per-block limits, so for them the limit is queried from the local CUDA device 0, and failing
+ * that taken from the given fallback.
+ * \note The local device 0 is not the device the code runs on when tuning over RPC or
+ * cross-compiling, so such targets should set the attribute explicitly.
+ */
+Integer ExtractPerBlockLimit(const Target& target, const char* name, runtime::DeviceAttrKind kind,
+                             Optional<Integer> fallback) {
+  if (Optional<Integer> v = target->GetAttr<Integer>(name)) {
+    return v.value();
+  }
+  if (target->kind->name == "cuda") {
+    if (Optional<Integer> v = QueryLocalCUDADevice(kind)) {
+      return v.value();
+    }
+    if (fallback.defined()) {
+      return fallback.value();
+    }
+  }
+  return Extract(target, name);
+}
+
 /*! \brief Verify the correctness of the generated GPU code. */
 class VerifyGPUCodeNode : public PostprocNode {
  public:
@@ -121,8 +164,14 @@ class VerifyGPUCodeNode : public PostprocNode {
     ICHECK(context->target.defined());
     this->target_ = context->target.value();
     this->target_constraints_ = Map<String, PrimExpr>{
-        {"max_shared_memory_per_block", Extract(this->target_, "max_shared_memory_per_block")},
-        {"max_threads_per_block", Extract(this->target_, "max_threads_per_block")},
+        // Every CUDA device supports 48 KB of static shared memory per block.
+        {"max_shared_memory_per_block",
+         ExtractPerBlockLimit(this->target_, "max_shared_memory_per_block",
+                              runtime::kMaxSharedMemoryPerBlock, Integer(49152))},
+        {"max_threads_per_block",
+         ExtractPerBlockLimit(this->target_, "max_threads_per_block",
+                              runtime::kMaxThreadsPerBlock,
+                              this->target_->GetAttr<Integer>("max_num_threads"))},
         {"max_vthread", Integer(8)},
         {"max_vector_bytes", Integer(16)},
     };
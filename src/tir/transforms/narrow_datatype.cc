@@ -196,6 +196,43 @@ class DataTypeVisitor final : public StmtExprVisitor {
   arith::ConstIntBoundAnalyzer::BoundMapType bound_;
 };
 
+// Detect whether any integer expression is wider than `target_bits`.
+// If none is, there is nothing to narrow, and the bound analysis of
+// DataTypeVisitor can be skipped altogether.
+class WideIntegerDetector final : public StmtExprVisitor {
+ public:
+  static bool Detect(const Stmt& stmt, int target_bits) {
+    WideIntegerDetector detector(target_bits);
+    detector(stmt);
+    return detector.found_;
+  }
+
+ private:
+  explicit WideIntegerDetector(int target_bits) : target_bits_(target_bits) {}
+
+  void VisitStmt(const Stmt& s) final {
+    if (!found_) {
+      StmtExprVisitor::VisitStmt(s);
+    }
+  }
+
+  void VisitExpr(const PrimExpr& e) final {
+    if (found_) {
+      return;
+    }
+    if (e.dtype().is_int() && e.dtype().bits() > target_bits_) {
+      found_ = true;
+      return;
+    }
+    StmtExprVisitor::VisitExpr(e);
+  }
+
+  // the target bits
+  int target_bits_;
+  // whether an integer expression wider than the target bits is found
+  bool found_{false};
+};
+
 class NarrowDataTypeRewriter : public IndexDataTypeRewriter {
  public:
   using Parent = IndexDataTypeRewriter;
@@ -301,6 +338,9 @@ namespace transform {
 
 Pass NarrowDataType(int target_bits) {
   auto pass_func = [target_bits](PrimFunc f, IRModule m, PassContext ctx) {
+    if (!WideIntegerDetector::Detect(f->body, target_bits)) {
+      return f;
+    }
     auto* n = f.CopyOnWrite();
     n->body = NarrowDataTypeRewriter(target_bits)(std::move(n->body));
     return f;
@@ -19,6 +19,7 @@ import pytest
 
 import tvm.testing
 from tvm import dlight as dl
+from tvm.dlight.gpu.gemv import _narrow_index_dtype
 from tvm.script import tir as T
 from tvm.target import Target
 
@@ -1060,5 +1061,88 @@ def test_func_to_skip():
         tvm.ir.assert_structural_equal(mod["main"], before)
 
 
+def _loop_var_dtypes(func):
+    loop_dtypes = set()
+
+    def fvisit(node):
+        if isinstance(node, tvm.tir.For):
+            loop_dtypes.add(node.loop_var.dtype)
+
+    tvm.tir.stmt_functor.post_order_visit(func.body, fvisit)
+    return loop_dtypes
+
+
+def _schedule_gemv(before, **kwargs):
+    mod = tvm.IRModule({"main": before})
+    with Target("nvidia/geforce-rtx-3090-ti"):
+        mod = dl.ApplyDefaultSchedule(dl.gpu.GEMV(**kwargs))(mod)
+    assert mod["main"].attrs["tir.is_scheduled"] == 1
+    return mod["main"]
+
+
+# fmt: off
+@T.prim_func(private=True)
+def _static_gemv_int64(A: T.Buffer((T.int64(4096), T.int64(4096)), "float16"), x: T.Buffer((T.int64(1), T.int64(4096)), "float16"), y: T.Buffer((T.int64(1), T.int64(4096)), "float16")):
+    T.func_attr({"tir.noalias": T.bool(True)})
+    for i0, i1, k in T.grid(T.int64(1), T.int64(4096), T.int64(4096)):
+        with T.block("matmul"):
+            v_i0, v_i1, v_k = T.axis.remap("SSR", [i0, i1, k])
+            with T.init():
+                y[v_i0, v_i1] = T.float16(0)
+            y[v_i0, v_i1] = y[v_i0, v_i1] + x[v_i0, v_k] * A[v_i1, v_k]
+# fmt: on
+
+
+def test_gemv_narrow_indices():
+    func = _schedule_gemv(_static_gemv_int64, narrow_indices=True)
+    assert _loop_var_dtypes(func) == {"int32"}
+
+
+def test_gemv_keeps_int64_indices_by_default():
+    func = _schedule_gemv(_static_gemv_int64)
+    assert "int64" in _loop_var_dtypes(func)
+
+
+def test_gemv_narrow_indices_declines_symbolic_extent():
+    # fmt: off
+    @T.prim_func(private=True)
+    def before(var_A: T.handle, x: T.Buffer((T.int64(1), T.int64(4096)), "float16"), var_y: T.handle):
+        T.func_attr({"tir.noalias": T.bool(True)})
+        n = T.int64()
+        A = T.match_buffer(var_A, (n, T.int64(4096)), "float16")
+        y = T.match_buffer(var_y, (T.int64(1), n), "float16")
+        for i0, i1, k in T.grid(T.int64(1), n, T.int64(4096)):
+            with T.block("matmul"):
+                v_i0, v_i1, v_k = T.axis.remap("SSR", [i0, i1, k])
+                with T.init():
+                    y[v_i0, v_i1] = T.float16(0)
+                y[v_i0, v_i1] = y[v_i0, v_i1] + x[v_i0, v_k] * A[v_i1, v_k]
+    # fmt: on
+
+    # n is not known to fit in int32, so the indices must stay int64.
+    func = _schedule_gemv(before, narrow_indices=True)
+    assert "int64" in _loop_var_dtypes(func)
+
+
+def test_narrow_index_dtype_bounds_dependent_extent():
+    @T.prim_func(private=True)
+    def before(A: T.Buffer((T.int64(1024), T.int64(1024)), "float32")):
+        for i in T.serial(T.int64(0), T.int64(1024)):
+            for j in T.serial(T.int64(0), i + T.int64(1)):
+                A[i, j] = T.float32(0)
+
+    # The extent of j only fits in int32 given the range of the enclosing loop over i.
+    assert _loop_var_dtypes(_narrow_index_dtype(before)) == {"int32"}
+
+
+def test_narrow_index_dtype_declines_large_extent():
+    @T.prim_func(private=True)
+    def before(A: T.Buffer((T.int64(2**31),), "float32")):
+        for i in T.serial(T.int64(0), T.int64(2**31)):
+            A[i] = T.float32(0)
+
+    assert _narrow_index_dtype(before).same_as(before)
+
+
 if __name__ == "__main__":
     tvm.testing.main()
@@ -142,8 +142,10 @@ POSTPROCS_FOR_DP4A = [
     ms.postproc.RewriteUnboundBlock(),
     ms.postproc.RewriteParallelVectorizeUnroll(),
     ms.postproc.RewriteReductionBlock(),
-    ms.postproc.RewriteTensorize(),
     ms.postproc.VerifyGPUCode(),
+    # RewriteTensorize is relatively expensive and it doesn't affect the validity of a sample, so
+    # run it only on samples that have passed VerifyGPUCode.
+    ms.postproc.RewriteTensorize(),
 ]
 
 
@@ -801,5 +801,28 @@ def test_postproc_check_fail(mod):
     assert not ctx.space_generator.postprocs[0].apply(sch)
 
 
+@pytest.mark.parametrize(
+    "mod,expected",
+    [
+        (Conv2dCuda0, True),
+        (Conv2dCuda2, False),  # 2 MB of shared memory exceeds the 48 KB fallback
+        (Conv2dCuda3, False),  # 800000 threads exceed the max_num_threads fallback
+    ],
+)
+def test_postproc_auto_detected_cuda_target(mod, expected):
+    # A plain "cuda" target carries neither max_shared_memory_per_block nor
+    # max_threads_per_block, which VerifyGPUCode falls back on instead of aborting.
+    ctx = _create_context(mod, target=Target("cuda"))
+    sch = tir.Schedule(mod, debug_mask="all")
+    assert ctx.space_generator.postprocs[0].apply(sch) == expected
+
+
+def test_postproc_applicable_to_target():
+    assert ms.postproc.VerifyGPUCode.applicable_to_target(_target())
+    assert ms.postproc.VerifyGPUCode.applicable_to_target(Target("vulkan"))
+    assert ms.postproc.VerifyGPUCode.applicable_to_target(Target("metal"))
+    assert not ms.postproc.VerifyGPUCode.applicable_to_target(Target("llvm"))
+
+
 if __name__ == "__main__":
     tvm.testing.main()
@@ -14,6 +14,11 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
+import functools
+
+import numpy as np
+import pytest
+
 import tvm
 from tvm import relay, te
 from tvm.driver.build_module import schedule_to_module
@@ -22,11 +27,118 @@ from tvm.tir import const
 import tvm.testing
 
 
-def lower_stmt(params, stmt, target_bits):
-    func = tvm.tir.PrimFunc(params, stmt)
-    func = tvm.tir.transform.NarrowDataType(target_bits)(tvm.IRModule.from_expr(func))["main"]
-    stmt = func.body
-    return stmt
+@functools.lru_cache(maxsize=None)
+def _get_narrow_pass(target_bits):
+    return tvm.tir.transform.NarrowDataType(target_bits)
+
+
+def _as_main_module(func):
+    return tvm.IRModule.from_expr(func.with_attr("global_symbol", "main"))
+
+
+def _nt_case(extent_a, extent_b, dtype, target_bits, target_dtype):
+    """A parameter row of the shape sweeps, grouped onto one pytest-xdist worker per
+    target_bits so the cached passes and PrimFuncs are reused."""
+    return pytest.param(
+        extent_a,
+        extent_b,
+        dtype,
+        target_bits,
+        target_dtype,
+        marks=pytest.mark.xdist_group(name="nt_{}".format(target_bits)),
+    )
+
+
+def lower_func(func, target_bits):
+    return _get_narrow_pass(target_bits)(tvm.IRModule.from_expr(func))["main"].body
+
+
+def check_index_dtypes(index_exprs, target_dtype):
+    np.testing.assert_array_equal(
+        [expr.dtype for expr in index_exprs], [target_dtype] * len(index_exprs)
+    )
+
+
+def _as_shape_expr(value, dtype):
+    return tvm.tir.IntImm(dtype, value)
+
+
+@functools.lru_cache(maxsize=None)
+def _mk_basic(m, n, dtype):
+    """String extents stand for symbolic sizes, which are passed as scalar parameters so that
+    the buffer shape m * n only uses defined variables."""
+    if isinstance(m, str):
+        size_var = functools.partial(getattr(T, dtype), is_size_var=True)
+
+        @T.prim_func(private=True)
+        def basic_add_symbolic(a: T.handle, b: T.handle, m: size_var, n: size_var):
+            A = T.match_buffer(a, (m * n,), "float32")
+            B = T.match_buffer(b, (m * n,), "float32")
+            for i, j in T.grid(m, n):
+                B[i * n + j] = A[i * n + j] + T.float32(1)
+
+        return basic_add_symbolic
+
+    m, n = _as_shape_expr(m, dtype), _as_shape_expr(n, dtype)
+
+    @T.prim_func(private=True)
+    def basic_add(A: T.Buffer((m * n,), "float32"), B: T.Buffer((m * n,), "float32")):
+        for i, j in T.grid(m, n):
+            B[i * n + j] = A[i * n + j] + T.float32(1)
+
+    return basic_add
+
+
+# Only the thread tags are shared: T.launch_thread accepts just the env threads created by
+# T.env_thread within the same PrimFunc, and fixes their extent on first launch.
+_BX_TAG = "blockIdx.x"
+_TX_TAG = "threadIdx.x"
+
+
+@functools.lru_cache(maxsize=None)
+def _mk_thread_axis(m, n, dtype):
+    m, n = _as_shape_expr(m, dtype), _as_shape_expr(n, dtype)
+
+    @T.prim_func(private=True)
+    def thread_axis_add(A: T.Buffer((m * n,), "float32"), B: T.Buffer((m * n,), "float32")):
+        bx = T.env_thread(_BX_TAG)
+        tx = T.env_thread(_TX_TAG)
+        T.launch_thread(bx, m)
+        T.launch_thread(tx, n)
+        B[bx * n + tx] = A[bx * n + tx] + T.float32(1)
+
+    return thread_axis_add
+
+
+@functools.lru_cache(maxsize=None)
+def _mk_multilane(m, lanes, dtype):
+    m = _as_shape_expr(m, dtype)
+    # Spell out the vector accesses with the base and stride in the loop dtype, so that
+    # narrowing the loop var has to keep both components of the Ramp consistent.
+    zero, one, base = (tvm.tir.IntImm(dtype, v) for v in (0, 1, lanes))
+
+    @T.prim_func(private=True)
+    def multilane_add(A: T.Buffer((m * lanes,), "float32"), B: T.Buffer((m * lanes,), "float32")):
+        for i in T.serial(m):
+            B[T.Ramp(i * lanes, one, lanes)] = A[T.Ramp(i * lanes, one, lanes)] + T.Broadcast(
+                T.float32(1), lanes
+            )
+        A[T.Ramp(zero, one, lanes)] = B[T.Ramp(base, one, lanes)]
+
+    return multilane_add
+
+
+@functools.lru_cache(maxsize=None)
+def _mk_slice(m, n, dtype):
+    m, n = _as_shape_expr(m, dtype), _as_shape_expr(n, dtype)
+
+    # The index may overflow in B, while not in A
+    @T.prim_func(private=True)
+    def slice_add(A: T.Buffer((m * n,), "float32"), B: T.Buffer((m * n * 2,), "float32")):
+        for i, j in T.grid(m, n):
+            A[i * n + j] = B[i * 2 * n + 2 * j] + T.float32(1)
+
+    return slice_add
 
 
 def lower_sch(sch, args, target_bits, extra_passes=None):
@@ -50,66 +162,51 @@ def lower_sch(sch, args, target_bits, extra_passes=None):
     return tvm.tir.transform.NarrowDataType(target_bits)(mod)["main"].body
 
 
-def test_basic():
-    def check(m, n, target_bits, target_dtype):
-        ib = tvm.tir.ir_builder.create()
-        Ab = tvm.tir.decl_buffer([m * n], name="A")
-        A = ib.buffer_ptr(Ab)
-        Bb = tvm.tir.decl_buffer([m * n], name="B")
-        B = ib.buffer_ptr(Bb)
-        with ib.for_range(0, m, name="i") as i:
-            with ib.for_range(0, n, name="j") as j:
-                B[i * n + j] = A[i * n + j] + 1
-        stmt = ib.get()
-        stmt = lower_stmt([Ab, Bb], stmt, target_bits)
-        assert stmt.loop_var.dtype == target_dtype
-        assert stmt.body.loop_var.dtype == target_dtype
-
-    # const shape
-    # i32 -> i32
-    check(2, 2, 32, "int32")
-    # i64 -> i32
-    check(const(2, dtype="int64"), const(2, dtype="int64"), 32, "int32")
-    check(const(2**16, dtype="int64"), const(2**16, dtype="int64"), 32, "int64")
-    # i32 -> i16
-    check(2, 2, 16, "int16")
-    check(2**10, 2**10, 16, "int32")
-
-    # symbolic shape
-    check(te.size_var(name="m", dtype="int32"), te.size_var(name="n", dtype="int32"), 32, "int32")
-    check(te.size_var(name="m", dtype="int64"), te.size_var(name="n", dtype="int64"), 32, "int64")
-
-
-def test_thread_axis():
-    def check(m, n, target_bits, target_dtype):
-        ib = tvm.tir.ir_builder.create()
-        Ab = tvm.tir.decl_buffer([m * n], name="A")
-        A = ib.buffer_ptr(Ab)
-        Bb = tvm.tir.decl_buffer([m * n], name="B")
-        B = ib.buffer_ptr(Bb)
-        bx = te.thread_axis("blockIdx.x")
-        tx = te.thread_axis("threadIdx.x")
-        ib.scope_attr(bx, "thread_extent", m)
-        ib.scope_attr(tx, "thread_extent", n)
-        B[bx * n + tx] = A[bx * n + tx] + 1
-        stmt = ib.get()
-        stmt = lower_stmt([Ab, Bb], stmt, target_bits)
-        assert stmt.node.var.dtype == target_dtype
-        assert stmt.body.node.var.dtype == target_dtype
-
-    # i32 -> i32
-    check(2, 32, target_bits=32, target_dtype="int32")
-    # i64 -> i32
-    check(const(2, dtype="int64"), const(32, dtype="int64"), target_bits=32, target_dtype="int32")
-    check(
-        const(2**30, dtype="int64"),
-        const(32, dtype="int64"),
-        target_bits=32,
-        target_dtype="int64",
-    )
-    # i32 -> i16
-    check(2, 32, target_bits=16, target_dtype="int16")
-    check(2**14, 32, target_bits=16, target_dtype="int32")
+@pytest.mark.parametrize(
+    "m,n,dtype,target_bits,target_dtype",
+    [
+        # const shape
+        # i32 -> i32
+        _nt_case(2, 2, "int32", 32, "int32"),
+        # i64 -> i32
+        _nt_case(2, 2, "int64", 32, "int32"),
+        _nt_case(2**16, 2**16, "int64", 32, "int64"),
+        # i32 -> i16
+        _nt_case(2, 2, "int32", 16, "int16"),
+        _nt_case(2**10, 2**10, "int32", 16, "int32"),
+        # symbolic shape
+        _nt_case("m", "n", "int32", 32, "int32"),
+        _nt_case("m", "n", "int64", 32, "int64"),
+    ],
+)
+def test_basic(m, n, dtype, target_bits, target_dtype):
+    stmt = lower_func(_mk_basic(m, n, dtype), target_bits)
+    check_index_dtypes([stmt.loop_var, stmt.body.loop_var], target_dtype)
+
+
+@pytest.mark.xdist_group(name="nt_32")
+def test_skip_already_narrow():
+    mod = tvm.IRModule.from_expr(_mk_basic(2, 2, "int32"))
+    after = _get_narrow_pass(32)(mod)
+    assert after["main"].same_as(mod["main"])
+
+
+@pytest.mark.parametrize(
+    "m,n,dtype,target_bits,target_dtype",
+    [
+        # i32 -> i32
+        _nt_case(2, 32, "int32", 32, "int32"),
+        # i64 -> i32
+        _nt_case(2, 32, "int64", 32, "int32"),
+        _nt_case(2**30, 32, "int64", 32, "int64"),
+        # i32 -> i16
+        _nt_case(2, 32, "int32", 16, "int16"),
+        _nt_case(2**14, 32, "int32", 16, "int32"),
+    ],
+)
+def test_thread_axis(m, n, dtype, target_bits, target_dtype):
+    stmt = lower_func(_mk_thread_axis(m, n, dtype), target_bits)
+    check_index_dtypes([stmt.node.var, stmt.body.node.var], target_dtype)
 
 
 def test_thread_axis_2():
@@ -139,28 +236,24 @@ def test_thread_axis_2():
     tvm.lower(Before)
 
 
-def test_multilanes():
-    def check(m, lanes, target_bits, target_dtype):
-        ib = tvm.tir.ir_builder.create()
-        Ab = tvm.tir.decl_buffer((m,), dtype="float32x{}".format(lanes), name="A")
-        A = ib.buffer_ptr(Ab)
-        Bb = tvm.tir.decl_buffer((m,), dtype="float32x{}".format(lanes), name="B")
-        B = ib.buffer_ptr(Bb)
-        with ib.for_range(0, m, name="i", dtype=m.dtype) as i:
-            B[i] = A[i] + 1
-        A[0] = B[1]
-        stmt = ib.get()
-        stmt = lower_stmt([Ab, Bb], stmt, target_bits)
-        assert stmt.seq[0].loop_var.dtype == target_dtype
-
-    # i32 -> i32
-    check(const(2**10, dtype="int32"), 2, target_bits=32, target_dtype="int32")
-    # i64 -> i32
-    check(const(2**10, dtype="int64"), 2, target_bits=32, target_dtype="int32")
-    check(const(2**32, dtype="int64"), 2, target_bits=32, target_dtype="int64")
-    # i32 -> i16
-    check(const(2**10, dtype="int32"), 2, target_bits=16, target_dtype="int16")
-    check(const(2**16, dtype="int32"), 2, target_bits=16, target_dtype="int32")
+@pytest.mark.parametrize(
+    "m,lanes,dtype,target_bits,target_dtype",
+    [
+        # i32 -> i32
+        _nt_case(2**10, 2, "int32", 32, "int32"),
+        # i64 -> i32
+        _nt_case(2**10, 2, "int64", 32, "int32"),
+        _nt_case(2**32, 2, "int64", 32, "int64"),
+        # i32 -> i16
+        _nt_case(2**10, 2, "int32", 16, "int16"),
+        _nt_case(2**16, 2, "int32", 16, "int32"),
+    ],
+)
+def test_multilanes(m, lanes, dtype, target_bits, target_dtype):
+    stmt = lower_func(_mk_multilane(m, lanes, dtype), target_bits)
+    loop = stmt.seq[0]
+    ramp = loop.body.indices[0]
+    check_index_dtypes([loop.loop_var, ramp.base, ramp.stride], target_dtype)
 
 
 def test_reduce():
@@ -184,28 +277,18 @@ def test_reduce():
     check(te.var("n", dtype="int64"), 32, "int64")
 
 
-def test_slice():
-    def check(m, n, target_bits, target_dtype):
-        # The index may overflow in B, while not in A
-        ib = tvm.tir.ir_builder.create()
-        Ab = tvm.tir.decl_buffer([m * n], name="A")
-        A = ib.buffer_ptr(Ab)
-        Bb = tvm.tir.decl_buffer([m * n * 2], name="B")
-        B = ib.buffer_ptr(Bb)
-        with ib.for_range(0, m, name="i") as i:
-            with ib.for_range(0, n, name="j") as j:
-                A[i * n + j] = B[i * 2 * n + 2 * j] + 1
-        stmt = ib.get()
-        stmt = lower_stmt([Ab, Bb], stmt, target_bits)
-        assert stmt.loop_var.dtype == target_dtype
-        assert stmt.body.loop_var.dtype == target_dtype
-
-    # The maximum index is (2**15 * 2**15 - 1) * 2 <= 2**31 - 1
-    check(const(2**15, "int64"), const(2**15, "int64"), target_bits=32, target_dtype="int32")
-    # The maximum index is (2**15 * 2**15 - 1 + 2**15) * 2 > 2**31 - 1
-    check(
-        const(2**15, "int64"), const((2**15 + 1), "int64"), target_bits=32, target_dtype="int64"
-    )
+@pytest.mark.parametrize(
+    "m,n,dtype,target_bits,target_dtype",
+    [
+        # The maximum index is (2**15 * 2**15 - 1) * 2 <= 2**31 - 1
+        _nt_case(2**15, 2**15, "int64", 32, "int32"),
+        # The maximum index is (2**15 * 2**15 - 1 + 2**15) * 2 > 2**31 - 1
+        _nt_case(2**15, 2**15 + 1, "int64", 32, "int64"),
+    ],
+)
+def test_slice(m, n, dtype, target_bits, target_dtype):
+    stmt = lower_func(_mk_slice(m, n, dtype), target_bits)
+    check_index_dtypes([stmt.loop_var, stmt.body.loop_var], target_dtype)
 
 
 def test_relay_basic():
@@ -297,120 +380,194 @@ def test_ramp_dtype_consistency():
     lower_sch(s, [A], 32, extra_passes=[tvm.tir.transform.VectorizeLoop()])
 
 
+@T.prim_func
+def _condition_before(A: T.Buffer((128,), "float32"), B: T.Buffer((130,), "float32")):
+    for i, j in T.grid(T.int64(2), T.int64(65)):
+        if i * T.int64(65) + j >= T.int64(0) and i * T.int64(65) + j < T.int64(128):
+            A[i * T.int64(65) + j] = 0.0
+    for i, j in T.grid(T.int64(2), T.int64(65)):
+        B[i * T.int64(65) + j] = T.if_then_else(
+            i * T.int64(65) + j >= T.int64(0) and i * T.int64(65) + j < T.int64(128),
+            A[i * T.int64(65) + j],
+            0.0,
+            dtype="float32",
+        )
+
+
+@T.prim_func
+def _condition_expected_after(A: T.Buffer(128, "float32"), B: T.Buffer(130, "float32")):
+    for i, j in T.grid(2, 65):
+        if i * 65 + j >= 0 and i * 65 + j < 128:
+            A[i * 65 + j] = T.float32(0)
+    for i, j in T.grid(2, 65):
+        B[i * 65 + j] = T.if_then_else(
+            i * 65 + j >= 0 and i * 65 + j < 128, A[i * 65 + j], T.float32(0), dtype="float32"
+        )
+
+
+_CONDITION_BEFORE_MOD = _as_main_module(_condition_before)
+_CONDITION_EXPECTED = _condition_expected_after.with_attr("global_symbol", "main")
+
+
+@pytest.mark.xdist_group(name="nt_32")
 def test_condition():
-    @T.prim_func
-    def before(A: T.Buffer((128,), "float32"), B: T.Buffer((130,), "float32")):
-        for i, j in T.grid(T.int64(2), T.int64(65)):
-            if i * T.int64(65) + j >= T.int64(0) and i * T.int64(65) + j < T.int64(128):
-                A[i * T.int64(65) + j] = 0.0
-        for i, j in T.grid(T.int64(2), T.int64(65)):
-            B[i * T.int64(65) + j] = T.if_then_else(
-                i * T.int64(65) + j >= T.int64(0) and i * T.int64(65) + j < T.int64(128),
-                A[i * T.int64(65) + j],
-                0.0,
+    after = _get_narrow_pass(32)(_CONDITION_BEFORE_MOD)["main"]
+    tvm.ir.assert_structural_equal(after, _CONDITION_EXPECTED)
+
+
+@T.prim_func
+def _condition_blocks_before(A: T.Buffer((128,), "float32"), B: T.Buffer((130,), "float32")):
+    for i, j in T.grid(T.int64(2), T.int64(65)):
+        with T.block("A"):
+            vi, vj = T.axis.remap("SS", [i, j])
+            if vi * T.int64(65) + vj < T.int64(128):
+                A[vi * T.int64(65) + vj] = T.float32(0)
+    for i, j in T.grid(T.int64(2), T.int64(65)):
+        with T.block("B"):
+            vi, vj = T.axis.remap("SS", [i, j])
+            B[vi * T.int64(65) + vj] = T.if_then_else(
+                vi * T.int64(65) + vj < T.int64(128),
+                A[vi * T.int64(65) + vj],
+                T.float32(0),
                 dtype="float32",
             )
 
-    @T.prim_func
-    def expected_after(A: T.Buffer(128, "float32"), B: T.Buffer(130, "float32")):
-        for i, j in T.grid(2, 65):
-            if i * 65 + j >= 0 and i * 65 + j < 128:
-                A[i * 65 + j] = T.float32(0)
-        for i, j in T.grid(2, 65):
-            B[i * 65 + j] = T.if_then_else(
-                i * 65 + j >= 0 and i * 65 + j < 128, A[i * 65 + j], T.float32(0), dtype="float32"
-            )
 
-    after = tvm.tir.transform.NarrowDataType(32)(
-        tvm.IRModule.from_expr(before.with_attr("global_symbol", "main"))
-    )["main"]
-    tvm.ir.assert_structural_equal(after, expected_after.with_attr("global_symbol", "main"))
+_CONDITION_BLOCKS_BEFORE_MOD = _as_main_module(_condition_blocks_before)
 
 
-def test_block():
-    @T.prim_func
-    def before(A: T.Buffer((128,), "float32"), B: T.Buffer((128,), "float32")):
-        for i in T.serial(0, T.int64(16)):
-            for j in T.serial(0, T.int64(8)):
-                with T.block():
-                    vi = T.axis.spatial(T.int64(128), i * T.int64(8) + j)
-                    B[vi] = A[vi] + T.float32(1)
-
-    @T.prim_func
-    def expected_after(A: T.Buffer((128,), "float32"), B: T.Buffer((128,), "float32")):
-        for i in T.serial(0, T.int32(16)):
-            for j in T.serial(0, T.int32(8)):
-                with T.block():
-                    vi = T.axis.spatial(T.int32(128), i * T.int32(8) + j)
-                    B[vi] = A[vi] + T.float32(1)
-
-    after = tvm.tir.transform.NarrowDataType(32)(
-        tvm.IRModule.from_expr(before.with_attr("global_symbol", "main"))
-    )["main"]
-    tvm.ir.assert_structural_equal(after, expected_after.with_attr("global_symbol", "main"))
+@pytest.mark.xdist_group(name="nt_32")
+def test_condition_fused():
+    # Same computation as test_condition, but with both loop nests merged and fused into one
+    # loop before narrowing, so every element of A is consumed right after it is produced.
+    sch = tvm.tir.Schedule(_CONDITION_BLOCKS_BEFORE_MOD)
+    sch.merge(sch.get_loops("A")[0], sch.get_loops("B")[0])
+    sch.merge(sch.get_loops("A")[1], sch.get_loops("B")[1])
+    sch.fuse(*sch.get_loops("A"))
+    after = _get_narrow_pass(32)(sch.mod)["main"]
 
+    loops = []
 
-def test_avg_pool2d():
-    @T.prim_func
-    def before(PSUM: T.Buffer((313600,), "int32"), PAVG: T.Buffer((313600,), "int32")):
-        for j in T.parallel(T.int64(0), T.int64(280)):
-            for i in T.serial(T.int64(0), T.int64(35)):
-                for vi in T.vectorized(T.int64(0), T.int64(32)):
-                    PAVG[(((j * T.int64(1120)) + (i * T.int64(32))) + vi)] = T.cast(
-                        T.Div(
-                            T.cast(PSUM[(((j * T.int64(1120)) + (i * T.int64(32))) + vi)], "int64"),
-                            T.max(
+    def fvisit(node):
+        if isinstance(node, tvm.tir.For):
+            loops.append(node)
+
+    tvm.tir.stmt_functor.post_order_visit(after.body, fvisit)
+    assert len(loops) == 1
+    assert loops[0].extent.value == 130
+    assert loops[0].loop_var.dtype == "int32"
+
+
+@T.prim_func
+def _block_before(A: T.Buffer((128,), "float32"), B: T.Buffer((128,), "float32")):
+    for i in T.serial(0, T.int64(16)):
+        for j in T.serial(0, T.int64(8)):
+            with T.block():
+                vi = T.axis.spatial(T.int64(128), i * T.int64(8) + j)
+                B[vi] = A[vi] + T.float32(1)
+
+
+@T.prim_func
+def _block_expected_after(A: T.Buffer((128,), "float32"), B: T.Buffer((128,), "float32")):
+    for i in T.serial(0, T.int32(16)):
+        for j in T.serial(0, T.int32(8)):
+            with T.block():
+                vi = T.axis.spatial(T.int32(128), i * T.int32(8) + j)
+                B[vi] = A[vi] + T.float32(1)
+
+
+_BLOCK_BEFORE_MOD = _as_main_module(_block_before)
+_BLOCK_EXPECTED = _block_expected_after.with_attr("global_symbol", "main")
+
+
+@pytest.mark.xdist_group(name="nt_32")
+def test_block():
+    after = _get_narrow_pass(32)(_BLOCK_BEFORE_MOD)["main"]
+    tvm.ir.assert_structural_equal(after, _BLOCK_EXPECTED)
+
+
+@T.prim_func
+def _avg_pool2d_before(PSUM: T.Buffer((313600,), "int32"), PAVG: T.Buffer((313600,), "int32")):
+    for j in T.parallel(T.int64(0), T.int64(280)):
+        for i in T.serial(T.int64(0), T.int64(35)):
+            for vi in T.vectorized(T.int64(0), T.int64(32)):
+                PAVG[(((j * T.int64(1120)) + (i * T.int64(32))) + vi)] = T.cast(
+                    T.Div(
+                        T.cast(PSUM[(((j * T.int64(1120)) + (i * T.int64(32))) + vi)], "int64"),
+                        T.max(
+                            (
                                 (
                                     (
-                                        (
-                                            T.min(
-                                                T.int64(1),
-                                                (T.int64(34) - T.floormod(j, T.int64(35))),
-                                            )
-                                            + T.int64(2)
-                                        )
-                                        - T.max(
-                                            (T.int64(1) - T.floormod(j, T.int64(35))), T.int64(0)
+                                        T.min(
+                                            T.int64(1),
+                                            (T.int64(34) - T.floormod(j, T.int64(35))),
                                         )
+                                        + T.int64(2)
                                     )
-                                    * (
-                                        (T.min(T.int64(1), (T.int64(34) - i)) + T.int64(2))
-                                        - T.max((T.int64(1) - i), T.int64(0))
+                                    - T.max(
+                                        (T.int64(1) - T.floormod(j, T.int64(35))), T.int64(0)
                                     )
-                                ),
-                                T.int64(1),
+                                )
+                                * (
+                                    (T.min(T.int64(1), (T.int64(34) - i)) + T.int64(2))
+                                    - T.max((T.int64(1) - i), T.int64(0))
+                                )
                             ),
+                            T.int64(1),
                         ),
-                        "int32",
-                    )
-
-    @T.prim_func
-    def expected_after(PSUM: T.Buffer((313600,), "int32"), PAVG: T.Buffer((313600,), "int32")):
-        for j in T.parallel(T.int32(0), T.int32(280)):
-            for i in T.serial(T.int32(0), T.int32(35)):
-                for vi in T.vectorized(T.int32(0), T.int32(32)):
-                    PAVG[(((j * T.int32(1120)) + (i * T.int32(32))) + vi)] = T.Div(
-                        PSUM[(((j * T.int32(1120)) + (i * T.int32(32))) + vi)],
+                    ),
+                    "int32",
+                )
+
+
+@T.prim_func
+def _avg_pool2d_expected_after(
+    PSUM: T.Buffer((313600,), "int32"), PAVG: T.Buffer((313600,), "int32")
+):
+    for j in T.parallel(T.int32(0), T.int32(280)):
+        for i in T.serial(T.int32(0), T.int32(35)):
+            for vi in T.vectorized(T.int32(0), T.int32(32)):
+                PAVG[(((j * T.int32(1120)) + (i * T.int32(32))) + vi)] = T.Div(
+                    PSUM[(((j * T.int32(1120)) + (i * T.int32(32))) + vi)],
+                    (
                         (
                             (
-                                (
-                                    T.min(T.int32(1), (T.int32(34) - T.floormod(j, T.int32(35))))
-                                    + T.int32(2)
-                                )
-                                - T.max((T.int32(1) - T.floormod(j, T.int32(35))), T.int32(0))
-                            )
-                            * (
-                                (T.min(T.int32(1), (T.int32(34) - i)) + T.int32(2))
-                                - T.max((T.int32(1) - i), T.int32(0))
+                                T.min(T.int32(1), (T.int32(34) - T.floormod(j, T.int32(35))))
+                                + T.int32(2)
                             )
-                        ),
-                    )
+                            - T.max((T.int32(1) - T.floormod(j, T.int32(35))), T.int32(0))
+                        )
+                        * (
+                            (T.min(T.int32(1), (T.int32(34) - i)) + T.int32(2))
+                            - T.max((T.int32(1) - i), T.int32(0))
+                        )
+                    ),
+                )
 
-    after = tvm.tir.transform.NarrowDataType(32)(
-        tvm.IRModule.from_expr(before.with_attr("global_symbol", "main"))
-    )
+
+_AVG_POOL2D_BEFORE_MOD = _as_main_module(_avg_pool2d_before)
+_AVG_POOL2D_EXPECTED = _avg_pool2d_expected_after.with_attr("global_symbol", "main")
+
+
+@pytest.mark.xdist_group(name="nt_32")
+def test_avg_pool2d():
+    after = _get_narrow_pass(32)(_AVG_POOL2D_BEFORE_MOD)
     after = tvm.tir.transform.Simplify()(after)
-    tvm.ir.assert_structural_equal(after["main"], expected_after.with_attr("global_symbol", "main"))
+    tvm.ir.assert_structural_equal(after["main"], _AVG_POOL2D_EXPECTED)
+
+    # The vectorized loop must be narrowed as well, and the downcast of the binary ops must
+    # leave no int64 cast chain behind, otherwise the inner loop falls back to scalar i64 code.
+    vec_loop = after["main"].body.body.body
+    assert vec_loop.kind == tvm.tir.ForKind.VECTORIZED
+    assert vec_loop.loop_var.dtype == "int32"
+    int64_casts = []
+
+    def fvisit(node):
+        if isinstance(node, tvm.tir.Cast) and node.dtype == "int64":
+            int64_casts.append(node)
+
+    tvm.tir.stmt_functor.post_order_visit(vec_loop.body, fvisit)
+    assert not int64_casts
 
 
 if __name__ == "__main__":